@@ -0,0 +1,7 @@
+#include "CSharedMemory.h"
+
+#include <sys/mman.h>
+
+int fv_shm_open(const char *name, int oflag, mode_t mode) {
+    return shm_open(name, oflag, mode);
+}
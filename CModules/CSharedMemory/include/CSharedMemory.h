@@ -0,0 +1,9 @@
+#ifndef CSHAREDMEMORY_H
+#define CSHAREDMEMORY_H
+
+#include <sys/types.h>
+
+/// Non-variadic wrapper around shm_open(2), which Swift cannot call directly
+int fv_shm_open(const char *name, int oflag, mode_t mode);
+
+#endif /* CSHAREDMEMORY_H */
@@ -17,12 +17,17 @@ let package = Package(
         .package(url: "https://github.com/kstenerud/KSCrash.git", .upToNextMajor(from: "2.3.0"))
     ],
     targets: [
+        .target(
+            name: "CSharedMemory",
+            path: "CModules/CSharedMemory"
+        ),
         .executableTarget(
             name: "FluidVoice",
             dependencies: [
                 "Alamofire", 
                 "HotKey", 
                 "WhisperKit",
+                "CSharedMemory",
                 .product(name: "Installations", package: "KSCrash")
             ],
             path: "Sources",
@@ -44,7 +49,7 @@ let package = Package(
             name: "FluidVoiceTests",
             dependencies: ["FluidVoice"],
             path: "Tests",
-            exclude: ["README.md", "test_parakeet_transcribe.py"],
+            exclude: ["README.md", "test_parakeet_transcribe.py", "test_parakeet_daemon.py"],
             swiftSettings: [
                 .define("DEBUG", .when(configuration: .debug))
             ]
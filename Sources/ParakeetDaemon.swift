@@ -66,8 +66,8 @@ final class ParakeetDaemon {
         try process.run()
         logger.infoDev("Parakeet daemon process started (PID: \(process.processIdentifier))")
         
-        // Wait for daemon to be ready
-        try await waitForReady(timeout: 10.0)
+        // Wait for daemon to be ready (model load plus a warm-up inference before "ready")
+        try await waitForReady(timeout: 30.0)
         
         logger.infoDev("Parakeet daemon is ready for requests")
         // Health tracking starts with first actual transcription
@@ -108,6 +108,21 @@ final class ParakeetDaemon {
     
     /// Send transcription request to daemon
     func transcribe(pcmFilePath: String) async throws -> ParakeetDaemonResponse {
+        return try await transcribe(request: ["pcm_path": pcmFilePath])
+    }
+    
+    /// Send transcription request to daemon using a shared memory PCM buffer (no disk round-trip)
+    func transcribe(sharedBuffer: SharedPCMBuffer) async throws -> ParakeetDaemonResponse {
+        let response = try await transcribe(request: [
+            "shm_name": sharedBuffer.name,
+            "n_samples": sharedBuffer.sampleCount
+        ])
+        // Keep the segment mapped until the daemon has answered
+        withExtendedLifetime(sharedBuffer) {}
+        return response
+    }
+    
+    private func transcribe(request: [String: Any]) async throws -> ParakeetDaemonResponse {
         guard isReady else {
             recordFailure()
             throw ParakeetDaemonError.daemonNotReady
@@ -118,7 +133,6 @@ final class ParakeetDaemon {
         defer { isCurrentlyTranscribing = false }
         
         do {
-            let request = ["pcm_path": pcmFilePath]
             let response = try await sendCommand(request)
             
             let result = ParakeetDaemonResponse(
@@ -209,14 +223,15 @@ final class ParakeetDaemon {
         
         // Serialize command to JSON
         let jsonData = try JSONSerialization.data(withJSONObject: command)
-        var jsonString = String(data: jsonData, encoding: .utf8) ?? ""
-        jsonString += "\n" // Add newline for readline()
-        
-        // Send command
-        guard let commandData = jsonString.data(using: .utf8) else {
+        guard let length = UInt32(exactly: jsonData.count) else {
             throw ParakeetDaemonError.encodingError
         }
         
+        // Frame as 4-byte little-endian length followed by the UTF-8 JSON payload
+        var commandData = Data(capacity: MemoryLayout<UInt32>.size + jsonData.count)
+        withUnsafeBytes(of: length.littleEndian) { commandData.append(contentsOf: $0) }
+        commandData.append(jsonData)
+        
         return try await withCheckedThrowingContinuation { continuation in
             // Setup response handler before sending command
             let responseHandler = DaemonResponseHandler { result in
@@ -54,23 +54,24 @@ class ParakeetService {
             throw ParakeetError.dependencyMissing("Parakeet v3 model", installCommand: "Download via Settings → Parakeet")
         }
 
-        // Step 1: Process audio with Swift AudioProcessor to create raw PCM data
-        let pcmDataURL = try await processAudioToRawPCM(audioFileURL: audioFileURL)
-        defer {
-            // Clean up the temporary PCM file
-            try? FileManager.default.removeItem(at: pcmDataURL)
-        }
+        // Step 1: Process audio with Swift AudioProcessor to create raw PCM samples
+        let samples = try decodeAudioToPCM(audioFileURL: audioFileURL)
         
         // Step 2: Choose transcription method based on daemon availability
         if useDaemonMode {
-            return try await transcribeWithDaemon(pcmDataURL: pcmDataURL, pythonPath: pythonPath)
+            return try await transcribeWithDaemon(samples: samples, pythonPath: pythonPath)
         } else {
+            let pcmDataURL = try writeRawPCM(samples)
+            defer {
+                // Clean up the temporary PCM file
+                try? FileManager.default.removeItem(at: pcmDataURL)
+            }
             return try await transcribeWithRawPCM(pcmDataURL: pcmDataURL, pythonPath: pythonPath)
         }
     }
     
     /// High-performance daemon-based transcription (eliminates Python startup overhead)
-    private func transcribeWithDaemon(pcmDataURL: URL, pythonPath: String) async throws -> String {
+    private func transcribeWithDaemon(samples: [Float], pythonPath: String) async throws -> String {
         
         // Ensure daemon is running
         if !(try await ParakeetDaemon.shared.ping()) {
@@ -78,8 +79,20 @@ class ParakeetService {
             try await ParakeetDaemon.shared.start(pythonPath: pythonPath)
         }
         
-        // Send transcription request to daemon
-        let response = try await ParakeetDaemon.shared.transcribe(pcmFilePath: pcmDataURL.path)
+        // Send transcription request to daemon - shared memory first, temp file as fallback
+        let response: ParakeetDaemonResponse
+        do {
+            let sharedBuffer = try SharedPCMBuffer(samples: samples)
+            response = try await ParakeetDaemon.shared.transcribe(sharedBuffer: sharedBuffer)
+        } catch let error as SharedPCMBufferError {
+            logger.warning("Shared PCM buffer unavailable, falling back to temp file: \(error.localizedDescription)")
+            let pcmDataURL = try writeRawPCM(samples)
+            defer {
+                // The daemon unlinks the file once opened; this only covers requests it never read
+                try? FileManager.default.removeItem(at: pcmDataURL)
+            }
+            response = try await ParakeetDaemon.shared.transcribe(pcmFilePath: pcmDataURL.path)
+        }
         
         if response.isSuccess {
             logger.info("Parakeet daemon transcription successful")
@@ -95,15 +108,21 @@ class ParakeetService {
         }
     }
     
-    private func processAudioToRawPCM(audioFileURL: URL) async throws -> URL {
+    private func decodeAudioToPCM(audioFileURL: URL) throws -> [Float] {
+        do {
+            // Use AudioProcessor.swift logic directly
+            return try loadAudio(url: audioFileURL, samplingRate: 16000)
+        } catch {
+            throw ParakeetError.transcriptionFailed("Audio processing failed: \(error.localizedDescription)")
+        }
+    }
+    
+    private func writeRawPCM(_ samples: [Float]) throws -> URL {
         // Create temporary file for raw PCM data
         let tempPCMURL = FileManager.default.temporaryDirectory
             .appendingPathComponent("audio_pcm_\(UUID().uuidString).raw")
         
         do {
-            // Use AudioProcessor.swift logic directly
-            let samples = try loadAudio(url: audioFileURL, samplingRate: 16000)
-            
             // Write raw float32 data
             let data = Data(bytes: samples, count: samples.count * MemoryLayout<Float>.size)
             try data.write(to: tempPCMURL)
@@ -0,0 +1,75 @@
+import Foundation
+import Darwin
+import CSharedMemory
+
+/// POSIX shared memory segment holding raw float32 PCM samples for the Parakeet daemon
+/// Hands audio to Python without writing and re-reading a temporary file per transcription
+final class SharedPCMBuffer {
+    /// Segment name without leading slash (Python's SharedMemory prepends it)
+    let name: String
+    let sampleCount: Int
+
+    private let path: String
+    private let byteCount: Int
+    private var address: UnsafeMutableRawPointer?
+
+    init(samples: [Float]) throws {
+        guard !samples.isEmpty else {
+            throw SharedPCMBufferError.emptyAudio
+        }
+
+        // macOS limits shm names to 31 characters (PSHMNAMLEN)
+        let token = UUID().uuidString.replacingOccurrences(of: "-", with: "").prefix(16)
+        self.name = "fvpcm_\(token)"
+        self.path = "/\(name)"
+        self.sampleCount = samples.count
+        self.byteCount = samples.count * MemoryLayout<Float>.size
+
+        let fd = fv_shm_open(path, O_CREAT | O_EXCL | O_RDWR, 0o600)
+        guard fd >= 0 else {
+            throw SharedPCMBufferError.systemCallFailed("shm_open", errno)
+        }
+        defer { close(fd) }
+
+        guard ftruncate(fd, off_t(byteCount)) == 0 else {
+            let code = errno
+            shm_unlink(path)
+            throw SharedPCMBufferError.systemCallFailed("ftruncate", code)
+        }
+
+        guard let mapped = mmap(nil, byteCount, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0),
+              mapped != UnsafeMutableRawPointer(bitPattern: -1) else {
+            let code = errno
+            shm_unlink(path)
+            throw SharedPCMBufferError.systemCallFailed("mmap", code)
+        }
+
+        samples.withUnsafeBytes { bytes in
+            if let baseAddress = bytes.baseAddress {
+                mapped.copyMemory(from: baseAddress, byteCount: byteCount)
+            }
+        }
+        self.address = mapped
+    }
+
+    deinit {
+        if let address = address {
+            munmap(address, byteCount)
+        }
+        shm_unlink(path)
+    }
+}
+
+enum SharedPCMBufferError: LocalizedError {
+    case emptyAudio
+    case systemCallFailed(String, Int32)
+
+    var errorDescription: String? {
+        switch self {
+        case .emptyAudio:
+            return "Cannot create shared PCM buffer for empty audio"
+        case .systemCallFailed(let call, let code):
+            return "Shared PCM buffer \(call) failed: \(String(cString: strerror(code)))"
+        }
+    }
+}
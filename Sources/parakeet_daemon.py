@@ -5,17 +5,24 @@ Eliminates Python startup and model loading overhead on each transcription.
 """
 
 import sys
+import errno
 import json
+import mmap
 import os
+import queue
+import select
 import signal
+import struct
+import threading
 import traceback
-from pathlib import Path
+from multiprocessing import resource_tracker, shared_memory
 
 # Allow online model loading if needed
 os.environ['HF_HUB_DISABLE_IMPLICIT_TOKEN'] = '1'
 
 try:
     import numpy as np
+    import orjson
     import mlx.core as mx
     from parakeet_mlx import from_pretrained
     from parakeet_mlx.audio import get_logmel
@@ -23,214 +30,809 @@ except ImportError as e:
     print(json.dumps({"status": "error", "message": f"Import failed: {e}"}), flush=True)
     sys.exit(1)
 
+# orjson parses and serializes in C straight to bytes
+loads = orjson.loads
+
+
+def dumps(obj):
+    """Serialize a response to JSON bytes, numpy scalars and arrays included"""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+STDOUT_FD = sys.stdout.fileno()
+
+
+def write_stdout(payload):
+    """Write pre-serialized response bytes straight to the stdout pipe, bypassing sys.stdout"""
+    # One os.write in practice; loop only in case the pipe accepts a partial write
+    view = memoryview(payload)
+    while view:
+        written = os.write(STDOUT_FD, view)
+        view = view[written:]
+
+
+def encode_response(response):
+    """Serialize a response as one newline-delimited JSON line"""
+    return dumps(response) + b"\n"
+
+
+def bucket_length(n_samples):
+    """Round a sample count up to the next whole multiple of BUCKET_SAMPLES"""
+    return -(-n_samples // BUCKET_SAMPLES) * BUCKET_SAMPLES
+
+
+def pad_audio(audio, length):
+    """Zero-pad a 1-D MLX audio array at the end to the given length"""
+    if audio.shape[0] >= length:
+        return audio
+    return mx.pad(audio, [(0, length - audio.shape[0])])
+
+
+def normalize_frames(mel, n_frames):
+    """Keep the first n_frames of a log-mel spectrogram and normalize each feature over them only.
+    
+    get_logmel normalizes over every frame, so frames computed from zero padding would shift
+    the mean and std. Normalization is affine per feature, so renormalizing the real frames
+    recovers the statistics of the unpadded audio.
+    """
+    mel = mel[..., :n_frames, :]
+    mean = mx.mean(mel, axis=-2, keepdims=True)
+    std = mx.std(mel, axis=-2, keepdims=True)
+    return (mel - mean) / (std + 1e-5)
+
+
+# Newer MLX releases moved the memory API from mx.metal to the top-level module
+mlx_memory = mx if hasattr(mx, "set_cache_limit") else mx.metal
+
+
+def env_megabytes(name, default_mb):
+    """Read a positive size in MB from the environment as bytes, ignoring malformed values"""
+    raw = os.environ.get(name)
+    try:
+        value = int(raw) if raw is not None else default_mb
+    except ValueError:
+        value = 0
+    
+    if value <= 0:
+        print(f"Ignoring invalid {name}={raw!r}, using {default_mb} MB", file=sys.stderr)
+        value = default_mb
+    return value * 1024 * 1024
+
+
+# Upper bound for MLX's freed-buffer cache, overridable for long-running sessions
+MLX_CACHE_LIMIT_BYTES = env_megabytes("FLUIDVOICE_MLX_CACHE_LIMIT_MB", 256)
+
+# Requests the reader thread has already queued are transcribed together, up to this many per
+# generate() call; it also bounds how many requests are read ahead of the one being transcribed
+MAX_BATCH_SIZE = 8
+
+# Requests with more audio than this (~60s at 16kHz float32) clear MLX's cache afterwards
+LARGE_AUDIO_BYTES = 4 * 1024 * 1024
+
+# The reusable padding buffer covers audio up to LARGE_AUDIO_BYTES; longer audio is padded by MLX
+STAGING_MAX_SAMPLES = LARGE_AUDIO_BYTES // 4
+
+# Tracebacks in error responses are only worth their cost when debugging the daemon
+DEBUG = os.environ.get("FLUIDVOICE_DEBUG") == "1"
+
+# Requests are small JSON objects - a larger length prefix means the stream is misframed
+MAX_FRAME_BYTES = 1024 * 1024
+
+# Audio is zero-padded to whole seconds at 16kHz, so each bucket compiles MLX kernels once
+BUCKET_SAMPLES = 16000
+
+
+class PCMLoadError(Exception):
+    """Expected failure loading a request's audio (missing, unreadable or malformed input)"""
+
+
+class FrameError(Exception):
+    """Malformed request framing on stdin (a length prefix beyond MAX_FRAME_BYTES)"""
+
+
+class ShutdownRequested(BaseException):
+    """Raised by the signal handler to unwind the main loop (deliberately not an Exception)"""
+
+
+class FrameReader:
+    """Reads length-prefixed request frames (4-byte little-endian length + UTF-8 JSON) from a file descriptor"""
+    
+    HEADER = struct.Struct("<I")
+    
+    def __init__(self, fd, read_size=65536, wakeup_fd=None):
+        self.fd = fd
+        self.read_size = read_size
+        self.wakeup_fd = wakeup_fd
+        self.buffer = bytearray()
+        self.eof = False
+    
+    def _fill(self):
+        """Append the next chunk from the fd; returns False on EOF.
+        
+        Raises InterruptedError when the non-blocking wakeup_fd becomes readable first.
+        """
+        if self.wakeup_fd is not None:
+            ready, _, _ = select.select([self.fd, self.wakeup_fd], [], [])
+            if self.wakeup_fd in ready:
+                self._drain_wakeup()
+                raise InterruptedError("Woken up by a signal")
+        
+        # Large reads coalesce several queued frames into one syscall
+        chunk = os.read(self.fd, self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        
+        self.buffer += chunk
+        return True
+    
+    def _drain_wakeup(self):
+        """Discard the bytes written to wakeup_fd so the next select() blocks again"""
+        try:
+            while os.read(self.wakeup_fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+    
+    def _take_frame(self):
+        """Pop one complete frame payload from the buffer, or None if it isn't complete yet"""
+        if len(self.buffer) < self.HEADER.size:
+            return None
+        
+        (length,) = self.HEADER.unpack_from(self.buffer)
+        if length > MAX_FRAME_BYTES:
+            # Nothing buffered can be trusted to start at a frame boundary
+            self.buffer.clear()
+            raise FrameError(f"Frame length {length} exceeds {MAX_FRAME_BYTES} bytes")
+        
+        end = self.HEADER.size + length
+        if len(self.buffer) < end:
+            return None
+        
+        payload = bytes(self.buffer[self.HEADER.size:end])
+        del self.buffer[:end]
+        return payload
+    
+    def read_frame(self):
+        """Block until a complete frame is available; returns None on EOF (see _fill for wakeups)"""
+        while True:
+            frame = self._take_frame()
+            if frame is not None or self.eof:
+                return frame
+            self._fill()
+
 
 class ParakeetDaemon:
+    # Fixed replies are serialized once instead of on every use
+    STARTING_RESPONSE = encode_response({"status": "starting", "message": "Parakeet daemon starting..."})
+    LOADING_RESPONSE = encode_response({"status": "loading", "message": "Loading Parakeet v3 model..."})
+    ONLINE_FALLBACK_RESPONSE = encode_response({"status": "loading", "message": "Falling back to online loading..."})
+    LISTENING_RESPONSE = encode_response({"status": "listening", "message": "Daemon ready for requests"})
+    PONG_RESPONSE = encode_response({"status": "pong", "message": "Daemon is alive"})
+    SHUTDOWN_ACK_RESPONSE = encode_response({"status": "shutdown", "message": "Shutting down gracefully"})
+    SIGNAL_SHUTDOWN_RESPONSE = encode_response({"status": "shutdown", "message": "Daemon shutting down"})
+    STOPPED_RESPONSE = encode_response({"status": "stopped", "message": "Daemon stopped"})
+    
     def __init__(self):
         self.model = None
+        self.preprocessor_config = None
+        self.compiled_logmel = None
+        self.pad_to_buckets = False
         self.model_repo = "mlx-community/parakeet-tdt-0.6b-v3"
         self.running = True
+        self.staging = None
+        # Signals also write to a self-pipe, which wakes the reader thread so that a signal
+        # arriving just before the main thread blocks is never left unhandled
+        self.wakeup_read, self.wakeup_write = os.pipe()
+        os.set_blocking(self.wakeup_read, False)
+        os.set_blocking(self.wakeup_write, False)
+        self.reader = FrameReader(sys.stdin.fileno(), wakeup_fd=self.wakeup_read)
+        
+        # Requests are read, parsed and their PCM loaded on a separate thread, so the next
+        # request is ready by the time generate() returns; MLX itself stays on the main thread
+        self.requests = queue.Queue(maxsize=MAX_BATCH_SIZE)
+        
+        # Responses are serialized and written on a separate thread so a slow reader
+        # on the Swift side never stalls the next inference
+        self.out_queue = queue.Queue(maxsize=64)
+        self.writer = threading.Thread(target=self._writer_loop, name="stdout-writer", daemon=True)
+        self.writer.start()
         
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGTERM, self._signal_handler)
         signal.signal(signal.SIGINT, self._signal_handler)
+        signal.set_wakeup_fd(self.wakeup_write, warn_on_full_buffer=False)
+    
+    def emit(self, response):
+        """Queue a response dict (or pre-serialized bytes) for the writer thread"""
+        self.out_queue.put(response)
+    
+    def _writer_loop(self):
+        """Serialize and write queued responses to stdout in order until the sentinel arrives"""
+        while True:
+            item = self.out_queue.get()
+            if item is None:
+                break
+            
+            try:
+                try:
+                    payload = item if isinstance(item, bytes) else encode_response(item)
+                except Exception as e:
+                    payload = encode_response({"status": "error", "message": f"Failed to serialize response: {e}"})
+                
+                write_stdout(payload)
+            except OSError:
+                # Swift host is gone; keep draining so producers never block on a full queue
+                self.running = False
+            except Exception as e:
+                # A single bad response must not kill the writer and leave every later one unanswered
+                print(f"Failed to write response: {e}", file=sys.stderr)
+    
+    def close_output(self):
+        """Flush every queued response and stop the writer thread"""
+        self.out_queue.put(None)
+        self.writer.join()
     
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully"""
+        if not self.running:  # Already shutting down
+            return
+        
+        # Unwind to run_daemon rather than writing here, so the shutdown reply is queued behind
+        # any response already emitted instead of interleaving with it
         self.running = False
-        print(json.dumps({"status": "shutdown", "message": "Daemon shutting down"}), flush=True)
+        raise ShutdownRequested()
     
     def initialize_model(self):
         """Load Parakeet model once at startup"""
         try:
-            print(json.dumps({"status": "loading", "message": "Loading Parakeet v3 model..."}), flush=True)
+            self.emit(self.LOADING_RESPONSE)
+            
+            # Keep MLX's buffer cache from growing without bound across requests
+            mlx_memory.set_cache_limit(MLX_CACHE_LIMIT_BYTES)
             
             # Try offline loading first for performance
             try:
                 self.model = from_pretrained(self.model_repo)
-                print(json.dumps({"status": "ready", "message": "Model loaded successfully"}), flush=True)
+                ready_message = "Model loaded successfully"
             except Exception as offline_error:
-                print(json.dumps({"status": "warning", "message": f"Model loading failed: {offline_error}"}), flush=True)
-                print(json.dumps({"status": "loading", "message": "Falling back to online loading..."}), flush=True)
+                self.emit({"status": "warning", "message": f"Model loading failed: {offline_error}"})
+                self.emit(self.ONLINE_FALLBACK_RESPONSE)
                 self.model = from_pretrained(self.model_repo)
-                print(json.dumps({"status": "ready", "message": "Model loaded online successfully"}), flush=True)
+                ready_message = "Model loaded online successfully"
+            
+            # Resolve the preprocessing config once instead of on every request
+            self.preprocessor_config = self.model.preprocessor_config
+            
+            # Fuse the log-mel preprocessing into one cached MLX graph per input shape
+            preprocessor_config = self.preprocessor_config
+            
+            def logmel(audio):
+                return get_logmel(audio, preprocessor_config)
+            
+            self.compiled_logmel = mx.compile(logmel)
+            
+            # Bucket padding can only be normalized away for per-feature normalization (Parakeet's default)
+            self.pad_to_buckets = (
+                getattr(preprocessor_config, "normalize", None) == "per_feature"
+                and getattr(preprocessor_config, "hop_length", None) is not None
+            )
+            
+            self.warmup_model()
+            self.emit({"status": "ready", "message": ready_message})
                 
             return True
             
         except Exception as e:
             error_msg = f"Failed to load model: {e}"
-            print(json.dumps({"status": "error", "message": error_msg}), flush=True)
+            self.emit({"status": "error", "message": error_msg})
             return False
     
+    def warmup_model(self):
+        """Run one silent inference so the first real request doesn't pay for kernel compilation"""
+        try:
+            # 1 second of silence at 16kHz compiles the Metal kernels and fills MLX's buffer pool
+            warmup = mx.zeros((16000,), dtype=mx.float32)
+            mel = self.compute_mel(warmup)
+            mx.eval(mel)
+            self.model.generate(mel)
+        except Exception as e:
+            # Warm-up is an optimization only - a failure here must not block the daemon
+            self.emit({"status": "warning", "message": f"Model warm-up failed: {e}"})
+    
+    def padded_length(self, n_samples):
+        """Length audio is zero-padded to before computing its log-mel spectrogram"""
+        return bucket_length(n_samples) if self.pad_to_buckets else n_samples
+    
+    def compute_mel(self, audio_mlx, n_samples=None):
+        """Log-mel spectrogram of audio whose first n_samples are real, normalized over those only"""
+        mel = self.logmel(audio_mlx)
+        if n_samples is None or n_samples >= audio_mlx.shape[0]:
+            return mel
+        
+        # Drop the frames that only cover padding (centered STFT: one frame per hop, plus one)
+        n_frames = min(mel.shape[-2], n_samples // self.preprocessor_config.hop_length + 1)
+        return normalize_frames(mel, n_frames)
+    
+    def logmel(self, audio_mlx):
+        """Log-mel spectrogram through the compiled graph, falling back to eager get_logmel"""
+        if self.compiled_logmel is not None:
+            try:
+                return self.compiled_logmel(audio_mlx)
+            except Exception as e:
+                # Don't retry tracing on every request once it has failed
+                self.compiled_logmel = None
+                self.emit({"status": "warning", "message": f"Compiled log-mel unavailable, using eager path: {e}"})
+        
+        return get_logmel(audio_mlx, self.preprocessor_config)
+    
     def load_raw_pcm(self, pcm_file_path, sample_rate=16000):
-        """Load pre-processed raw float32 PCM data"""
+        """Memory-map pre-processed raw float32 PCM data"""
         try:
-            # Verify file exists and is readable
-            pcm_path = Path(pcm_file_path)
-            if not pcm_path.exists():
-                raise FileNotFoundError(f"PCM file not found: {pcm_file_path}")
-            if not os.access(pcm_file_path, os.R_OK):
-                raise PermissionError(f"Cannot read PCM file: {pcm_file_path}")
+            # A single open() both checks existence and readability (no stat/access round-trips)
+            try:
+                fd = os.open(pcm_file_path, os.O_RDONLY)
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    raise FileNotFoundError(f"PCM file not found: {pcm_file_path}")
+                if e.errno in (errno.EACCES, errno.EPERM):
+                    raise PermissionError(f"Cannot read PCM file: {pcm_file_path}")
+                raise
             
-            # Read raw float32 data from file
-            audio_data = np.fromfile(pcm_file_path, dtype=np.float32)
+            try:
+                size = os.fstat(fd).st_size
+                if size == 0:
+                    raise ValueError("PCM file is empty")
+                
+                # Map raw float32 data from the page cache instead of reading it into a fresh buffer;
+                # the samples are copied exactly once, when they are staged for MLX
+                mapping = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+                if hasattr(mmap, "MADV_WILLNEED"):
+                    # Requests are loaded ahead of transcription - start paging the samples in now
+                    mapping.madvise(mmap.MADV_WILLNEED)
+            finally:
+                # The file is single-use: drop its directory entry as soon as it is open so
+                # temp PCM files never pile up (the mapping keeps the data alive until staged)
+                try:
+                    os.unlink(pcm_file_path)
+                except OSError:
+                    pass
+                os.close(fd)
             
+            # Viewed as float32 directly, so transcription never needs to cast
+            audio_data = np.frombuffer(mapping, dtype=np.float32, count=size // 4)
             if len(audio_data) == 0:
                 raise ValueError("PCM file is empty")
-                
+            
             return audio_data
             
         except Exception as e:
-            raise Exception(f"Error loading PCM data: {e}")
+            raise PCMLoadError(f"Error loading PCM data: {e}")
     
-    def transcribe_audio(self, pcm_file_path):
-        """Transcribe audio from PCM file path"""
+    def load_shared_pcm(self, shm_name, n_samples):
+        """Attach to a POSIX shared memory segment of float32 PCM created by the Swift host"""
         try:
-            if self.model is None:
-                raise RuntimeError("Model not initialized")
-            
-            # Load the pre-processed PCM data
-            audio_data = self.load_raw_pcm(pcm_file_path, sample_rate=16000)
-            
-            # Convert numpy array to MLX array (parakeet-mlx's format)
-            audio_mlx = mx.array(audio_data.astype(np.float32))
-            
-            # Convert directly to log-mel spectrogram
-            mel = get_logmel(audio_mlx, self.model.preprocessor_config)
-            
-            # Generate transcription from mel spectrogram
-            result = self.model.generate(mel)
-            
-            # Extract text and language information from result
-            text = ""
-            detected_language = None
-            confidence = None
-            
-            if isinstance(result, list) and len(result) > 0:
-                # model.generate() returns a list of AlignedResult objects
-                result_obj = result[0]
-                text = result_obj.text if hasattr(result_obj, 'text') else str(result_obj)
-                # Try to extract language information if available
-                if hasattr(result_obj, 'language'):
-                    detected_language = result_obj.language
-                if hasattr(result_obj, 'confidence'):
-                    confidence = result_obj.confidence
-            elif hasattr(result, "text"):
-                text = result.text
-                if hasattr(result, 'language'):
-                    detected_language = result.language  
-                if hasattr(result, 'confidence'):
-                    confidence = result.confidence
-            elif hasattr(result, "texts") and len(result.texts) > 0:
-                text = result.texts[0]
-            elif isinstance(result, dict) and "text" in result:
-                text = result["text"]
-                detected_language = result.get("language")
-                confidence = result.get("confidence")
-            elif isinstance(result, dict) and "texts" in result and len(result["texts"]) > 0:
-                text = result["texts"][0]
-            else:
-                raise AttributeError(f"Cannot extract text from result: {result}")
-            
-            text = text.strip() if text else ""
-            
-            # Return successful transcription
-            return {
-                "status": "success",
-                "text": text,
-                "language": detected_language,
-                "confidence": confidence
-            }
+            shm = shared_memory.SharedMemory(name=shm_name)
+        except Exception as e:
+            raise PCMLoadError(f"Error opening shared PCM buffer: {e}")
+        
+        # The Swift host owns the segment and unlinks it after the response,
+        # so keep Python's resource tracker from unlinking it on daemon exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        
+        if n_samples <= 0 or n_samples * 4 > shm.size:
+            shm.close()
+            raise PCMLoadError(f"Invalid sample count {n_samples} for shared PCM buffer of {shm.size} bytes")
+        
+        return shm
+    
+    def read_request_pcm(self, request_data):
+        """Read file PCM or attach shared memory PCM for a request.
+        
+        Returns (source, n_samples): the samples array and None for files, or the
+        shared memory handle and its sample count for shared memory requests.
+        """
+        if "shm_name" in request_data:
+            # Preferred path: PCM handed over via shared memory, no disk round-trip
+            if "n_samples" not in request_data:
+                raise PCMLoadError("Missing 'n_samples' in shared memory request")
             
+            n_samples = int(request_data["n_samples"])
+            return self.load_shared_pcm(request_data["shm_name"], n_samples), n_samples
+        
+        if "pcm_path" not in request_data:
+            raise PCMLoadError("Missing 'pcm_path' or 'shm_name' in request")
+        
+        return self.load_raw_pcm(request_data["pcm_path"], sample_rate=16000), None
+    
+    def stage_audio(self, audio_data):
+        """Copy samples into an MLX array, zero-padded to their bucket length"""
+        n_samples = len(audio_data)
+        padded = self.padded_length(n_samples)
+        
+        # Already a whole bucket - mx.array's copy is the only one needed
+        if padded == n_samples:
+            return mx.array(audio_data)
+        
+        # Don't keep a buffer sized for the longest recording alive for the daemon's lifetime
+        if padded > STAGING_MAX_SAMPLES:
+            return pad_audio(mx.array(audio_data), padded)
+        
+        # Grow to the next power of two (up to the cap) so varying lengths rarely reallocate
+        if self.staging is None or self.staging.size < padded:
+            self.staging = np.zeros(min(1 << (padded - 1).bit_length(), STAGING_MAX_SAMPLES), dtype=np.float32)
+        
+        self.staging[:n_samples] = audio_data
+        self.staging[n_samples:padded] = 0.0
+        
+        # mx.array copies, so the staging buffer is free for the next request right away
+        return mx.array(self.staging[:padded])
+    
+    def to_mlx_audio(self, loaded_pcm):
+        """Copy loaded PCM into an MLX array, releasing any shared segment.
+        
+        Returns (audio_mlx, n_samples), where samples beyond n_samples are zero padding.
+        """
+        source, n_samples = loaded_pcm
+        if n_samples is None:
+            # Convert numpy array to MLX array (parakeet-mlx's format) - already float32, no cast
+            return self.stage_audio(source), len(source)
+        
+        # Zero-copy view into the shared segment, released as soon as it is staged
+        audio_data = np.ndarray((n_samples,), dtype=np.float32, buffer=source.buf)
+        try:
+            staged = self.stage_audio(audio_data)
+        except BaseException as e:
+            # The traceback keeps stage_audio's frame, and its view of the segment, alive;
+            # close() must not run with views left or it fails and masks this error
+            traceback.clear_frames(e.__traceback__)
+            raise
+        finally:
+            del audio_data
+            source.close()
+        
+        return staged, n_samples
+    
+    def prefetch_pcm(self, request_data):
+        """Read a request's PCM ahead of transcription as a (loaded_pcm, error) pair.
+        
+        Runs on the reader thread; a failure is kept and re-raised by load_audio, so the
+        request still gets its own error response in order.
+        """
+        try:
+            return self.read_request_pcm(request_data), None
         except Exception as e:
-            return {
-                "status": "error", 
-                "message": str(e),
-                "traceback": traceback.format_exc()
-            }
+            return None, e
     
-    def process_request(self, request_data):
-        """Process a single transcription request"""
+    def load_audio(self, pending):
+        """Copy a prefetched request's PCM into MLX as an (audio_mlx, n_samples) pair"""
+        loaded_pcm, error = pending
+        if error is not None:
+            raise error
+        return self.to_mlx_audio(loaded_pcm)
+    
+    def extract_result(self, result):
+        """Build the success response from a model.generate() result"""
         try:
-            if "pcm_path" not in request_data:
-                return {"status": "error", "message": "Missing 'pcm_path' in request"}
+            # Fast path: model.generate() returns a list of AlignedResult objects
+            result_obj = result[0]
+            text = result_obj.text
+        except (TypeError, IndexError, KeyError, AttributeError):
+            return self._extract_result_slow(result)
+        
+        return {
+            "status": "success",
+            "text": text.strip() if text else "",
+            "language": getattr(result_obj, 'language', None),
+            "confidence": getattr(result_obj, 'confidence', None)
+        }
+    
+    def _extract_result_slow(self, result):
+        """Probe the other result shapes parakeet-mlx versions have returned"""
+        text = ""
+        detected_language = None
+        confidence = None
+        
+        if isinstance(result, list) and len(result) > 0:
+            # model.generate() returns a list of AlignedResult objects
+            result_obj = result[0]
+            text = result_obj.text if hasattr(result_obj, 'text') else str(result_obj)
+            # Try to extract language information if available
+            if hasattr(result_obj, 'language'):
+                detected_language = result_obj.language
+            if hasattr(result_obj, 'confidence'):
+                confidence = result_obj.confidence
+        elif hasattr(result, "text"):
+            text = result.text
+            if hasattr(result, 'language'):
+                detected_language = result.language  
+            if hasattr(result, 'confidence'):
+                confidence = result.confidence
+        elif hasattr(result, "texts") and len(result.texts) > 0:
+            text = result.texts[0]
+        elif isinstance(result, dict) and "text" in result:
+            text = result["text"]
+            detected_language = result.get("language")
+            confidence = result.get("confidence")
+        elif isinstance(result, dict) and "texts" in result and len(result["texts"]) > 0:
+            text = result["texts"][0]
+        else:
+            raise AttributeError(f"Cannot extract text from result: {result}")
+        
+        text = text.strip() if text else ""
+        
+        return {
+            "status": "success",
+            "text": text,
+            "language": detected_language,
+            "confidence": confidence
+        }
+    
+    def prepare_mel(self, audio_mlx, n_samples):
+        """Batched (1, frames, n_mels) log-mel spectrogram covering exactly the real audio of a clip"""
+        # Whole-second bucket so the compiled log-mel graph is reused (no-op for staged audio)
+        audio_mlx = pad_audio(audio_mlx, self.padded_length(n_samples))
+        
+        # Convert directly to log-mel spectrogram; the encoder only sees frames of real audio
+        mel = self.compute_mel(audio_mlx, n_samples)
+        return mel if mel.ndim == 3 else mx.expand_dims(mel, 0)
+    
+    def transcribe_mel(self, mel):
+        """Transcribe a single log-mel spectrogram"""
+        if self.model is None:
+            raise RuntimeError("Model not initialized")
+        
+        # Generate transcription from mel spectrogram
+        result = self.model.generate(mel)
+        
+        # Return successful transcription
+        return self.extract_result(result)
+    
+    def transcribe_audio(self, audio_mlx, n_samples):
+        """Transcribe a single MLX audio array with n_samples of real audio"""
+        return self.transcribe_mel(self.prepare_mel(audio_mlx, n_samples))
+    
+    def transcribe_batch(self, mels):
+        """Transcribe several log-mel spectrograms of one frame count with one model.generate() call"""
+        if self.model is None:
+            raise RuntimeError("Model not initialized")
+        
+        # generate() takes no per-item lengths, so padding a shorter spectrogram would have its
+        # padding decoded as audio - callers only batch spectrograms of identical length
+        if len({mel.shape[1] for mel in mels}) != 1:
+            raise ValueError("Batched spectrograms must have the same number of frames")
+        
+        # One AlignedResult per batch item, in input order
+        results = self.model.generate(mx.concatenate(mels, axis=0))
+        if len(results) != len(mels):
+            raise RuntimeError(f"Batch returned {len(results)} results for {len(mels)} inputs")
+        
+        return [self.extract_result([result]) for result in results]
+    
+    def error_response(self, message):
+        """Build an error response for the exception currently being handled.
+        
+        Tracebacks are only formatted in debug mode, and never for PCMLoadError:
+        missing or unreadable audio is a caller error, not a daemon bug.
+        """
+        include_traceback = DEBUG and not isinstance(sys.exc_info()[1], PCMLoadError)
+        return {
+            "status": "error", 
+            "message": message,
+            "traceback": traceback.format_exc() if include_traceback else None
+        }
+    
+    def process_batch(self, pending):
+        """Process prefetched transcription requests, batching the ones whose audio loads"""
+        responses = [None] * len(pending)
+        mels = {}
+        largest_audio_bytes = 0
+        
+        if len(pending) > 1:
+            for index, prefetched in enumerate(pending):
+                try:
+                    audio_mlx, n_samples = self.load_audio(prefetched)
+                    largest_audio_bytes = max(largest_audio_bytes, audio_mlx.nbytes)
+                    mels[index] = self.prepare_mel(audio_mlx, n_samples)
+                except Exception as e:
+                    responses[index] = self.error_response(str(e))
+                finally:
+                    audio_mlx = None
             
-            pcm_path = request_data["pcm_path"]
-            result = self.transcribe_audio(pcm_path)
+            # Only spectrograms with exactly the same frame count share a generate() call
+            groups = {}
+            for index, mel in mels.items():
+                groups.setdefault(mel.shape[1], []).append(index)
             
-            return result
+            for indices in groups.values():
+                if len(indices) < 2:
+                    continue
+                try:
+                    batch_responses = self.transcribe_batch([mels[index] for index in indices])
+                    for index, response in zip(indices, batch_responses):
+                        responses[index] = response
+                        del mels[index]
+                except Exception:
+                    # Fall back to one generate() call per request below
+                    pass
+        
+        # Per-request path: audio is loaded right before its own generate() call
+        for index, prefetched in enumerate(pending):
+            if responses[index] is not None:
+                continue
+            try:
+                if index in mels:
+                    responses[index] = self.transcribe_mel(mels.pop(index))
+                    continue
+                
+                audio_mlx, n_samples = self.load_audio(prefetched)
+                largest_audio_bytes = max(largest_audio_bytes, audio_mlx.nbytes)
+                responses[index] = self.transcribe_audio(audio_mlx, n_samples)
+            except Exception as e:
+                responses[index] = self.error_response(str(e))
+            finally:
+                # Last reference to this request's audio - free it before the next one loads
+                audio_mlx = None
+        
+        # The cache limit bounds steady-state growth; long recordings additionally leave large
+        # cached tensors behind, so drop the cache once their intermediates are freed
+        if largest_audio_bytes > LARGE_AUDIO_BYTES:
+            mlx_memory.clear_cache()
+        
+        return responses
+    
+    def process_request(self, pending):
+        """Process a single transcription request"""
+        try:
+            return self.process_batch([pending])[0]
             
         except Exception as e:
-            return {
-                "status": "error", 
-                "message": f"Request processing failed: {e}",
-                "traceback": traceback.format_exc()
-            }
+            return self.error_response(f"Request processing failed: {e}")
     
-    def run_daemon(self):
-        """Main daemon loop - listen for requests on stdin"""
-        print(json.dumps({"status": "starting", "message": "Parakeet daemon starting..."}), flush=True)
+    def read_pending_requests(self, limit):
+        """Collect requests the reader thread has already queued without blocking"""
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
         
-        # Initialize model at startup
-        if not self.initialize_model():
-            sys.exit(1)
+        return items
+    
+    def flush_batch(self, batch):
+        """Transcribe the collected requests and emit their responses in order"""
+        if not batch:
+            return
         
-        print(json.dumps({"status": "listening", "message": "Daemon ready for requests"}), flush=True)
+        if len(batch) == 1:
+            responses = [self.process_request(batch[0])]
+        else:
+            responses = self.process_batch(batch)
         
-        # Main request processing loop
-        while self.running:
+        for response in responses:
+            self.emit(response)
+        batch.clear()
+    
+    def parse_frame(self, frame):
+        """Turn one request frame into a (kind, payload) item for the main loop"""
+        if isinstance(frame, FrameError):
+            return "response", {"status": "error", "message": f"Invalid frame: {frame}"}
+        
+        # Parse JSON request straight from the UTF-8 payload
+        try:
+            request = loads(frame)
+        except ValueError as e:  # orjson.JSONDecodeError, also raised for payloads that aren't valid UTF-8
+            return "response", {"status": "error", "message": f"Invalid JSON: {e}"}
+        
+        if not isinstance(request, dict):
+            return "response", {"status": "error", "message": "Invalid request: expected a JSON object"}
+        
+        # Handle special commands
+        if request.get("command") == "ping":
+            return "response", self.PONG_RESPONSE
+        
+        if request.get("command") == "shutdown":
+            return "shutdown", None
+        
+        # Transcription request - its audio is read now, while earlier requests are transcribed
+        return "transcribe", self.prefetch_pcm(request)
+    
+    def _reader_loop(self):
+        """Read and parse request frames from stdin and queue them in order until shutdown or EOF"""
+        while True:
             try:
-                # Read request from stdin (blocking)
-                line = sys.stdin.readline()
-                
-                if not line:  # EOF - Swift process closed stdin
-                    break
-                
-                line = line.strip()
-                if not line:  # Empty line
-                    continue
-                
-                # Parse JSON request
+                # Read length-prefixed request frame from stdin (blocking)
                 try:
-                    request = json.loads(line)
-                except json.JSONDecodeError as e:
-                    response = {"status": "error", "message": f"Invalid JSON: {e}"}
-                    print(json.dumps(response), flush=True)
-                    continue
+                    frame = self.reader.read_frame()
+                except FrameError as e:  # Answered in order with the frames around it
+                    frame = e
                 
-                # Handle special commands
-                if request.get("command") == "ping":
-                    response = {"status": "pong", "message": "Daemon is alive"}
-                    print(json.dumps(response), flush=True)
+                if frame is None:  # EOF - Swift process closed stdin
+                    item = "eof", None
+                elif not frame:  # Empty frame
                     continue
+                else:
+                    item = self.parse_frame(frame)
+            except InterruptedError:
+                # A signal arrived - hand the main thread an item so it stops waiting in
+                # requests.get() and runs the Python-level handler
+                item = "wakeup", None
+            except OSError:
+                # stdin itself is unusable - treat it like the host closing it
+                item = "eof", None
+            except Exception as e:
+                item = "response", {"status": "error", "message": f"Daemon error: {e}"}
+            
+            self.requests.put(item)
+            if item[0] in ("eof", "shutdown"):
+                return
+    
+    def handle_request(self, kind, payload, batch):
+        """Answer or queue one item from the reader thread; returns False once the loop should stop"""
+        if kind == "wakeup":  # Only there to unblock the main thread for a signal handler
+            return True
+        
+        if kind == "transcribe":
+            batch.append(payload)
+            return True
+        
+        # Everything else is answered after any earlier transcriptions, preserving order
+        self.flush_batch(batch)
+        
+        if kind == "response":
+            self.emit(payload)
+            return True
+        
+        if kind == "shutdown":
+            self.emit(self.SHUTDOWN_ACK_RESPONSE)
+        
+        # Shutdown command or EOF - the reader thread has stopped
+        self.running = False
+        return False
+    
+    def run_daemon(self):
+        """Main daemon loop - listen for requests on stdin"""
+        self.emit(self.STARTING_RESPONSE)
+        
+        try:
+            # Initialize model at startup
+            if not self.initialize_model():
+                self.running = False
+                self.close_output()
+                sys.exit(1)
+            
+            self.emit(self.LISTENING_RESPONSE)
+            self.serve_requests()
+        except (ShutdownRequested, KeyboardInterrupt):
+            self.emit(self.SIGNAL_SHUTDOWN_RESPONSE)
+        
+        self.running = False
+        self.emit(self.STOPPED_RESPONSE)
+        self.close_output()
+    
+    def serve_requests(self):
+        """Answer requests from the reader thread until shutdown or EOF on stdin"""
+        reader_thread = threading.Thread(target=self._reader_loop, name="stdin-reader", daemon=True)
+        reader_thread.start()
+        
+        while self.running:
+            batch = []
+            try:
+                # Drain whatever else is already queued so transcriptions can share one generate() call
+                items = [self.requests.get()] + self.read_pending_requests(MAX_BATCH_SIZE - 1)
                 
-                if request.get("command") == "shutdown":
-                    self.running = False
-                    response = {"status": "shutdown", "message": "Shutting down gracefully"}
-                    print(json.dumps(response), flush=True)
-                    break
+                for kind, payload in items:
+                    # A bad request only fails itself - later requests in the drained batch still get answered
+                    try:
+                        if not self.handle_request(kind, payload, batch):
+                            break
+                    except Exception as e:
+                        self.flush_batch(batch)
+                        self.emit(self.error_response(f"Daemon error: {e}"))
                 
-                # Process transcription request
-                response = self.process_request(request)
-                print(json.dumps(response), flush=True)
+                # Process transcription requests
+                self.flush_batch(batch)
                 
-            except KeyboardInterrupt:
-                break
             except Exception as e:
-                error_response = {
-                    "status": "error", 
-                    "message": f"Daemon error: {e}",
-                    "traceback": traceback.format_exc()
-                }
-                print(json.dumps(error_response), flush=True)
-        
-        print(json.dumps({"status": "stopped", "message": "Daemon stopped"}), flush=True)
-
-
-def main():
-    """Main entry point"""
-    daemon = ParakeetDaemon()
-    daemon.run_daemon()
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+                self.emit(self.error_response(f"Daemon error: {e}"))
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Test suite for parakeet_daemon.py
+
+This file tests the request handling of the Parakeet daemon that runs without a model.
+Run with: python3 test_parakeet_daemon.py
+"""
+
+import errno
+import importlib.util
+import os
+import struct
+import sys
+import tempfile
+import traceback
+import unittest
+from types import SimpleNamespace
+from multiprocessing import shared_memory
+from unittest.mock import MagicMock, patch
+
+# Real dependencies of the daemon, imported before sys.modules is patched so they stay loaded
+import numpy as np
+import orjson  # noqa: F401
+
+# Add the source directory to Python path to import our script
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Sources"))
+
+# The code under test needs none of the ML stack - stand in for whatever isn't installed
+# just long enough to import the module
+HEAVY_MODULES = ["mlx", "mlx.core", "parakeet_mlx", "parakeet_mlx.audio"]
+
+
+def _missing(name):
+    try:
+        return importlib.util.find_spec(name) is None
+    except ImportError:
+        return True
+
+
+# Modules that are installed are imported for real up front, so restoring sys.modules after
+# the import only drops the stand-ins
+stubs = {}
+for name in HEAVY_MODULES:
+    if _missing(name):
+        stubs[name] = MagicMock()
+    else:
+        importlib.import_module(name)
+
+with patch.dict(sys.modules, stubs):
+    import parakeet_daemon
+
+FrameReader = parakeet_daemon.FrameReader
+FrameError = parakeet_daemon.FrameError
+
+
+def make_daemon(test):
+    """Create a daemon without installing its signal handlers in the test process"""
+    with patch("signal.signal"), patch("signal.set_wakeup_fd"):
+        daemon = parakeet_daemon.ParakeetDaemon()
+    test.addCleanup(daemon.close_output)
+    test.addCleanup(os.close, daemon.wakeup_read)
+    test.addCleanup(os.close, daemon.wakeup_write)
+    return daemon
+
+
+def frame(payload):
+    """Encode a payload the way ParakeetDaemon.swift frames requests"""
+    return struct.pack("<I", len(payload)) + payload
+
+
+class TestFrameReader(unittest.TestCase):
+    """Test length-prefixed frame parsing over a pipe"""
+
+    def setUp(self):
+        self.read_fd, self.write_fd = os.pipe()
+
+    def tearDown(self):
+        os.close(self.read_fd)
+        if self.write_fd is not None:
+            os.close(self.write_fd)
+
+    def close_writer(self):
+        os.close(self.write_fd)
+        self.write_fd = None
+
+    def test_single_frame(self):
+        """Test a frame delivered in one write"""
+        os.write(self.write_fd, frame(b'{"command": "ping"}'))
+        reader = FrameReader(self.read_fd)
+
+        self.assertEqual(reader.read_frame(), b'{"command": "ping"}')
+
+    def test_partial_frame(self):
+        """Test a frame split across several small reads"""
+        os.write(self.write_fd, frame(b'{"pcm_path": "/tmp/audio.pcm"}'))
+        reader = FrameReader(self.read_fd, read_size=3)
+
+        self.assertEqual(reader.read_frame(), b'{"pcm_path": "/tmp/audio.pcm"}')
+
+    def test_coalesced_frames(self):
+        """Test several frames arriving in a single read"""
+        os.write(self.write_fd, frame(b'{"a": 1}') + frame(b'{"b": 2}') + frame(b'{"c": 3}'))
+        reader = FrameReader(self.read_fd)
+
+        self.assertEqual(reader.read_frame(), b'{"a": 1}')
+        self.assertEqual(reader.read_frame(), b'{"b": 2}')
+        self.assertEqual(reader.read_frame(), b'{"c": 3}')
+
+    def test_empty_frame(self):
+        """Test a zero-length frame followed by a regular one"""
+        os.write(self.write_fd, frame(b"") + frame(b'{"command": "ping"}'))
+        reader = FrameReader(self.read_fd)
+
+        self.assertEqual(reader.read_frame(), b"")
+        self.assertEqual(reader.read_frame(), b'{"command": "ping"}')
+
+    def test_eof(self):
+        """Test EOF with no data"""
+        self.close_writer()
+        reader = FrameReader(self.read_fd)
+
+        self.assertIsNone(reader.read_frame())
+        self.assertIsNone(reader.read_frame())
+
+    def test_eof_mid_frame(self):
+        """Test EOF after a truncated frame"""
+        os.write(self.write_fd, frame(b'{"command": "shutdown"}')[:10])
+        self.close_writer()
+        reader = FrameReader(self.read_fd, read_size=4)
+
+        self.assertIsNone(reader.read_frame())
+
+    def test_oversized_frame(self):
+        """Test that a length prefix beyond the cap is rejected instead of buffered"""
+        os.write(self.write_fd, struct.pack("<I", parakeet_daemon.MAX_FRAME_BYTES + 1) + b"{}")
+        reader = FrameReader(self.read_fd)
+
+        with self.assertRaises(FrameError):
+            reader.read_frame()
+
+        # The reader keeps working for correctly framed requests afterwards
+        os.write(self.write_fd, frame(b'{"command": "ping"}'))
+        self.assertEqual(reader.read_frame(), b'{"command": "ping"}')
+
+    def test_wakeup(self):
+        """Test that a byte on the wakeup fd interrupts a blocked read without losing data"""
+        wakeup_read, wakeup_write = os.pipe()
+        self.addCleanup(os.close, wakeup_read)
+        self.addCleanup(os.close, wakeup_write)
+        os.set_blocking(wakeup_read, False)
+        os.write(wakeup_write, b"\x0f\x0f")
+        reader = FrameReader(self.read_fd, wakeup_fd=wakeup_read)
+
+        with self.assertRaises(InterruptedError):
+            reader.read_frame()
+
+        # Both wakeup bytes were drained, so the next read waits for the frame again
+        os.write(self.write_fd, frame(b'{"command": "ping"}'))
+        self.assertEqual(reader.read_frame(), b'{"command": "ping"}')
+
+
+class TestRequestDecoding(unittest.TestCase):
+    """Test request parsing and response encoding"""
+
+    def test_valid_request(self):
+        """Test a request parsed straight from frame bytes"""
+        self.assertEqual(parakeet_daemon.loads(b'{"shm_name": "fvpcm_0", "n_samples": 16000}'),
+                         {"shm_name": "fvpcm_0", "n_samples": 16000})
+
+    def test_encode_response(self):
+        """Test that responses are one JSON line and numpy values serialize"""
+        line = parakeet_daemon.encode_response({"status": "success", "confidence": np.float32(0.5)})
+
+        self.assertEqual(line, b'{"status":"success","confidence":0.5}\n')
+
+    def test_invalid_json(self):
+        """Test a payload that is not JSON"""
+        with self.assertRaises(ValueError):
+            parakeet_daemon.loads(b"not json")
+
+    def test_invalid_utf8(self):
+        """Test a payload that is not valid UTF-8"""
+        with self.assertRaises(ValueError):
+            parakeet_daemon.loads(b'{"pcm_path": "\xff"}')
+
+
+class TestRequestReader(unittest.TestCase):
+    """Test the reader thread's parsing of stdin into queued requests"""
+
+    def setUp(self):
+        self.daemon = make_daemon(self)
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.writer = os.fdopen(write_fd, "wb")
+        self.daemon.reader = FrameReader(read_fd, wakeup_fd=self.daemon.wakeup_read)
+
+    def read_requests(self, *payloads):
+        """Run the reader loop over the given frames and return everything it queued"""
+        with self.writer:
+            self.writer.write(b"".join(frame(payload) for payload in payloads))
+        self.daemon._reader_loop()
+        return self.daemon.read_pending_requests(parakeet_daemon.MAX_BATCH_SIZE)
+
+    def test_requests_keep_their_order(self):
+        """Test that every kind of frame is queued in arrival order, ending at EOF"""
+        items = self.read_requests(b'{"command": "ping"}', b"", b"not json", b"[]", b'{"pcm_path": "/nonexistent.pcm"}')
+
+        self.assertEqual([kind for kind, _ in items], ["response", "response", "response", "transcribe", "eof"])
+        self.assertEqual(items[0][1], parakeet_daemon.ParakeetDaemon.PONG_RESPONSE)
+        self.assertTrue(items[1][1]["message"].startswith("Invalid JSON"))
+        self.assertEqual(items[2][1]["message"], "Invalid request: expected a JSON object")
+
+    def test_load_error_is_kept_for_its_request(self):
+        """Test that a PCM load failure on the reader thread is raised once the request is transcribed"""
+        (kind, pending), _ = self.read_requests(b'{"pcm_path": "/nonexistent.pcm"}')
+
+        self.assertEqual(kind, "transcribe")
+        with self.assertRaises(parakeet_daemon.PCMLoadError):
+            self.daemon.load_audio(pending)
+
+    def test_reading_stops_at_shutdown(self):
+        """Test that nothing after a shutdown command is read"""
+        items = self.read_requests(b'{"command": "shutdown"}', b'{"command": "ping"}')
+
+        self.assertEqual(items, [("shutdown", None)])
+
+    def test_signal_wakes_main_thread(self):
+        """Test that a signal's wakeup byte is queued for the main thread ahead of later requests"""
+        os.write(self.daemon.wakeup_write, bytes([15]))
+        items = self.read_requests(b'{"command": "ping"}')
+
+        self.assertEqual([kind for kind, _ in items], ["wakeup", "response", "eof"])
+
+
+class TestPCMLoading(unittest.TestCase):
+    """Test loading raw PCM files"""
+
+    def setUp(self):
+        self.daemon = make_daemon(self)
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = os.path.join(self.tempdir.name, "audio.pcm")
+
+    def load_error(self, path):
+        with self.assertRaises(parakeet_daemon.PCMLoadError) as context:
+            self.daemon.load_raw_pcm(path)
+        return str(context.exception)
+
+    def test_load(self):
+        """Test that samples come back as float32 and the file is unlinked once read"""
+        np.arange(5, dtype=np.float32).tofile(self.path)
+
+        audio = self.daemon.load_raw_pcm(self.path)
+
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_array_equal(audio, np.arange(5, dtype=np.float32))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_missing_file(self):
+        """Test that ENOENT is reported as a missing file"""
+        self.assertIn(f"PCM file not found: {self.path}", self.load_error(self.path))
+
+    def test_permission_denied(self):
+        """Test that EACCES is reported as an unreadable file"""
+        denied = PermissionError(errno.EACCES, "Permission denied")
+        with patch("os.open", side_effect=denied):
+            self.assertIn(f"Cannot read PCM file: {self.path}", self.load_error(self.path))
+
+    def test_empty_file_is_unlinked(self):
+        """Test that an empty file is rejected and still removed"""
+        open(self.path, "wb").close()
+
+        self.assertIn("PCM file is empty", self.load_error(self.path))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_short_file_is_unlinked(self):
+        """Test that a file shorter than one sample is rejected and still removed"""
+        with open(self.path, "wb") as f:
+            f.write(b"\x00\x00")
+
+        self.assertIn("PCM file is empty", self.load_error(self.path))
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestResultExtraction(unittest.TestCase):
+    """Test building success responses from model.generate() results"""
+
+    def setUp(self):
+        self.daemon = make_daemon(self)
+
+    def test_fast_path_matches_slow_path(self):
+        """Test that an AlignedResult list gives the same response on both paths"""
+        results = [
+            [SimpleNamespace(text="  hello world ", language="en", confidence=0.9)],
+            [SimpleNamespace(text="hallo")],
+            [SimpleNamespace(text="")],
+            [SimpleNamespace(text=None, language="de")],
+        ]
+        for result in results:
+            with self.subTest(result=result):
+                self.assertEqual(self.daemon.extract_result(result), self.daemon._extract_result_slow(result))
+
+    def test_other_result_shapes(self):
+        """Test result shapes that only the slow path handles"""
+        cases = [
+            (SimpleNamespace(text=" single ", language="en"), ("single", "en", None)),
+            (SimpleNamespace(texts=["first", "second"]), ("first", None, None)),
+            ({"text": "from dict", "confidence": 0.5}, ("from dict", None, 0.5)),
+            ({"texts": [" listed "]}, ("listed", None, None)),
+            (["plain string"], ("plain string", None, None)),
+        ]
+        for result, (text, language, confidence) in cases:
+            with self.subTest(result=result):
+                self.assertEqual(self.daemon.extract_result(result), {
+                    "status": "success", "text": text, "language": language, "confidence": confidence
+                })
+
+    def test_unknown_result(self):
+        """Test that a result without any text is an error"""
+        with self.assertRaises(AttributeError):
+            self.daemon.extract_result(42)
+
+
+class TestErrorResponse(unittest.TestCase):
+    """Test traceback gating in error responses"""
+
+    def setUp(self):
+        self.daemon = make_daemon(self)
+
+    def error_response(self, error):
+        try:
+            raise error
+        except Exception as e:
+            return self.daemon.error_response(str(e))
+
+    def test_no_traceback_by_default(self):
+        """Test that tracebacks are left out unless debugging"""
+        with patch.object(parakeet_daemon, "DEBUG", False):
+            response = self.error_response(RuntimeError("boom"))
+
+        self.assertEqual(response, {"status": "error", "message": "boom", "traceback": None})
+
+    def test_traceback_when_debugging(self):
+        """Test that daemon errors carry their traceback in debug mode"""
+        with patch.object(parakeet_daemon, "DEBUG", True):
+            response = self.error_response(RuntimeError("boom"))
+
+        self.assertIn("RuntimeError: boom", response["traceback"])
+
+    def test_no_traceback_for_load_errors(self):
+        """Test that PCM load errors never carry a traceback, even in debug mode"""
+        with patch.object(parakeet_daemon, "DEBUG", True):
+            response = self.error_response(parakeet_daemon.PCMLoadError("missing"))
+
+        self.assertIsNone(response["traceback"])
+
+
+class TestStaging(unittest.TestCase):
+    """Test bucketing and staging of audio before it is handed to MLX"""
+
+    def setUp(self):
+        self.daemon = make_daemon(self)
+        self.daemon.pad_to_buckets = True
+
+        # numpy covers the small part of the MLX API used for staging
+        patcher = patch.object(parakeet_daemon, "mx", np)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bucket_length(self):
+        """Test rounding sample counts up to whole buckets"""
+        bucket = parakeet_daemon.BUCKET_SAMPLES
+        for n_samples, expected in [(0, 0), (1, bucket), (bucket, bucket), (bucket + 1, 2 * bucket)]:
+            with self.subTest(n_samples=n_samples):
+                self.assertEqual(parakeet_daemon.bucket_length(n_samples), expected)
+
+    def test_pads_with_zeros(self):
+        """Test that staged audio is the samples followed by zeros up to the bucket"""
+        first = np.ones(20000, dtype=np.float32)
+        self.daemon.stage_audio(first)
+
+        # The staging buffer is reused - a shorter clip must not see leftovers of the last one
+        staged = self.daemon.stage_audio(np.full(100, 2.0, dtype=np.float32))
+
+        self.assertEqual(staged.shape, (parakeet_daemon.BUCKET_SAMPLES,))
+        np.testing.assert_array_equal(staged[:100], 2.0)
+        np.testing.assert_array_equal(staged[100:], 0.0)
+
+    def test_staged_audio_is_a_copy(self):
+        """Test that staged audio does not alias the reusable staging buffer"""
+        staged = self.daemon.stage_audio(np.ones(100, dtype=np.float32))
+        self.daemon.stage_audio(np.full(100, 3.0, dtype=np.float32))
+
+        np.testing.assert_array_equal(staged[:100], 1.0)
+
+    def test_whole_bucket_skips_staging(self):
+        """Test that audio already a whole bucket long is not copied into the staging buffer"""
+        audio = np.ones(parakeet_daemon.BUCKET_SAMPLES, dtype=np.float32)
+
+        staged = self.daemon.stage_audio(audio)
+
+        np.testing.assert_array_equal(staged, audio)
+        self.assertIsNone(self.daemon.staging)
+
+    def test_staging_buffer_is_capped(self):
+        """Test that long audio is padded without growing the staging buffer past its cap"""
+        self.daemon.stage_audio(np.ones(100, dtype=np.float32))
+        n_samples = parakeet_daemon.STAGING_MAX_SAMPLES + 1
+
+        staged = self.daemon.stage_audio(np.ones(n_samples, dtype=np.float32))
+
+        self.assertEqual(staged.shape, (parakeet_daemon.bucket_length(n_samples),))
+        self.assertEqual(staged[n_samples - 1], 1.0)
+        self.assertEqual(staged[n_samples], 0.0)
+        self.assertLessEqual(self.daemon.staging.size, parakeet_daemon.STAGING_MAX_SAMPLES)
+
+    def test_no_padding_without_buckets(self):
+        """Test that audio is staged at its own length when bucketing is off"""
+        self.daemon.pad_to_buckets = False
+
+        staged = self.daemon.stage_audio(np.ones(100, dtype=np.float32))
+
+        self.assertEqual(staged.shape, (100,))
+
+
+class TestSharedPCM(unittest.TestCase):
+    """Test handing shared memory PCM to MLX"""
+
+    def setUp(self):
+        self.daemon = make_daemon(self)
+        self.shm = shared_memory.SharedMemory(create=True, size=16 * 4)
+        self.addCleanup(self.shm.unlink)
+
+    def test_staging_error_closes_segment(self):
+        """Test that a staging failure surfaces unmasked and still unmaps the segment"""
+        failing_mx = MagicMock()
+        failing_mx.array.side_effect = RuntimeError("staging failed")
+        # Caught by hand: assertRaises clears the traceback frames itself
+        error = None
+        with patch.object(parakeet_daemon, "mx", failing_mx):
+            try:
+                self.daemon.to_mlx_audio((self.shm, 16))
+            except RuntimeError as e:
+                error = e
+
+        self.assertEqual(str(error), "staging failed")
+        self.assertIsNone(self.shm.buf)
+
+        # No frame in the traceback may still hold a view of the closed segment
+        for frame, _ in traceback.walk_tb(error.__traceback__):
+            for value in frame.f_locals.values():
+                self.assertFalse(isinstance(value, np.ndarray), "traceback keeps a view of the segment")
+
+
+
+HOP_LENGTH = 160
+
+
+def fake_logmel(audio, config):
+    """Stand-in for get_logmel: one centered frame per hop, normalized per feature over all frames"""
+    n_frames = audio.shape[0] // HOP_LENGTH + 1
+    frames = np.pad(audio, (0, n_frames * HOP_LENGTH - audio.shape[0])).reshape(n_frames, HOP_LENGTH)
+    mel = np.log(np.stack([np.abs(frames).sum(axis=1), np.square(frames).sum(axis=1)], axis=1) + 1e-5)
+    mel = (mel - mel.mean(axis=0)) / (mel.std(axis=0) + 1e-5)
+    return mel[np.newaxis].astype(np.float32)
+
+
+class StubModel:
+    """Parakeet stand-in that describes each spectrogram it decodes instead of transcribing it"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def generate(self, mel):
+        self.batch_sizes.append(mel.shape[0])
+        return [
+            SimpleNamespace(text=f"frames={item.shape[0]} checksum={np.round(item, 3).sum():.3f}")
+            for item in mel
+        ]
+
+
+class TestTranscription(unittest.TestCase):
+    """Test that batched and single-request transcription see the same spectrogram"""
+
+    def setUp(self):
+        self.daemon = make_daemon(self)
+        self.daemon.model = StubModel()
+        self.daemon.preprocessor_config = SimpleNamespace(hop_length=HOP_LENGTH, normalize="per_feature")
+        self.daemon.pad_to_buckets = True
+
+        # numpy covers the small part of the MLX API used outside the model
+        for patcher in (patch.object(parakeet_daemon, "mx", np), patch.object(parakeet_daemon, "get_logmel", fake_logmel)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.rng = np.random.default_rng(0)
+        self.files = 0
+
+    def pcm_request(self, samples):
+        """Write samples as a raw float32 PCM file request and prefetch it like the reader thread"""
+        self.files += 1
+        path = os.path.join(self.tempdir.name, f"audio{self.files}.pcm")
+        samples.astype(np.float32).tofile(path)
+        return self.daemon.prefetch_pcm({"pcm_path": path})
+
+    def transcribe_single(self, samples):
+        return self.daemon.process_batch([self.pcm_request(samples)])[0]
+
+    def test_padding_is_normalized_away(self):
+        """Test that bucket padding does not change the spectrogram of a clip"""
+        samples = self.rng.standard_normal(20000)
+
+        padded = self.daemon.prepare_mel(np.array(samples, dtype=np.float32), 20000)
+        unpadded = fake_logmel(samples.astype(np.float32), None)
+
+        self.assertEqual(padded.shape, unpadded.shape)
+        np.testing.assert_allclose(padded, unpadded, atol=1e-3)
+
+    def test_batched_clip_matches_single_clip(self):
+        """Test that clips sharing a generate() call get the same result as transcribed alone"""
+        first = self.rng.standard_normal(20000)
+        second = self.rng.standard_normal(20000)
+
+        batched = self.daemon.process_batch([self.pcm_request(first), self.pcm_request(second)])
+
+        self.assertEqual(self.daemon.model.batch_sizes, [2])
+        self.assertEqual(batched, [self.transcribe_single(first), self.transcribe_single(second)])
+
+    def test_different_lengths_are_not_batched(self):
+        """Test that a shorter clip is never decoded with padding up to a longer neighbour"""
+        short = self.rng.standard_normal(20000)
+        long = self.rng.standard_normal(31000)
+
+        batched = self.daemon.process_batch([self.pcm_request(short), self.pcm_request(long)])
+
+        self.assertEqual(self.daemon.model.batch_sizes, [1, 1])
+        self.assertTrue(batched[0]["text"].startswith(f"frames={20000 // HOP_LENGTH + 1} "))
+        self.assertEqual(batched, [self.transcribe_single(short), self.transcribe_single(long)])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)